@@ -1,8 +1,11 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g
 import tempfile
 import os
 import gc  # For memory cleanup
 import sys
+import json
+import time
+import threading
 
 # Add current directory to Python path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -12,6 +15,35 @@ from llload import get_k_nearest_low_risk_routes, build_and_save_map, flood_df,
 
 app = Flask(__name__)
 
+# Number of low-risk routes returned by /map
+ROUTES_K = 5
+
+# Traffic recording (for loadtest.py replay) - set TRAFFIC_LOG=/path/to/traffic.jsonl
+# loadtest.py clears it for the app it replays against, so replays never append to the log
+TRAFFIC_LOG = os.environ.get("TRAFFIC_LOG", "")
+_traffic_lock = threading.Lock()
+
+@app.before_request
+def mark_arrival():
+    # Log arrival, not completion, so replays keep the real arrival pattern
+    g.arrival_time = time.time()
+
+@app.after_request
+def record_traffic(response):
+    if TRAFFIC_LOG and request.endpoint is not None:
+        entry = {
+            "timestamp": g.get("arrival_time", time.time()),
+            "endpoint": request.path,
+            "region": request.args.get("region"),
+            "k": ROUTES_K if request.path == "/map" else None,
+        }
+        try:
+            with _traffic_lock, open(TRAFFIC_LOG, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError:
+            pass  # Never fail a request because the log can't be written
+    return response
+
 @app.route("/")
 def home():
     return jsonify({
@@ -52,7 +84,7 @@ def map_page():
         if not region:
             return jsonify({"error": "Region not provided. Use ?region=<region_name>"}), 400
 
-        matched, score, routes = get_k_nearest_low_risk_routes(region, G, flood_df, k=5)
+        matched, score, routes = get_k_nearest_low_risk_routes(region, G, flood_df, k=ROUTES_K)
         if not matched or not routes:
             return jsonify({
                 "error": f"Could not generate map for '{region}'",
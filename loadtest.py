@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+"""
+loadtest.py - Record, synthesize and replay traffic against the Mumbai Flood API
+
+Traffic logs are JSONL, one request per line:
+  {"timestamp": 1718000000.0, "endpoint": "/map", "region": "andheri", "k": 5}
+
+Recording:
+  Start the API with TRAFFIC_LOG=/path/to/traffic.jsonl and every request is appended.
+
+Usage:
+  python loadtest.py synth --count 500 --rate 10 --out traffic.jsonl
+  python loadtest.py replay traffic.jsonl --target client --concurrency 4 --rate 5
+  python loadtest.py replay traffic.jsonl --target gunicorn --workers 2 --concurrency 16 --rate 5,10,20,40
+  python loadtest.py replay traffic.jsonl --speed 1.0     # original arrival times
+
+Reports throughput, p50/p95/p99 latency, error rate and per-worker RSS over time.
+RSS sampling reads /proc and is only available on Linux.
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(ROOT, "api")
+CSV = os.path.join(APP_DIR, "mumbai_ward_area_floodrisk.csv")
+
+# Endpoint mix used by `synth` (roughly what the frontend sends)
+ENDPOINT_MIX = [("/map", 0.80), ("/regions", 0.15), ("/health", 0.05)]
+
+
+# ----------------------------
+# Traffic log
+# ----------------------------
+def load_log(path):
+    """Read a JSONL traffic log, skipping blank and malformed lines"""
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(entry, dict) or not isinstance(entry.get("endpoint"), str):
+                continue
+            timestamp = entry.get("timestamp")
+            if isinstance(timestamp, bool) or not isinstance(timestamp, (int, float, type(None))):
+                continue
+            entries.append(entry)
+    entries.sort(key=lambda e: e.get("timestamp") or 0)
+    return entries
+
+
+def synth_log(count, rate, seed=None):
+    """Generate a production-shaped log: Poisson arrivals, skewed region popularity"""
+    rng = random.Random(seed)
+    with open(CSV, "r", encoding="utf-8") as f:
+        areas = [row["Areas"].strip().lower() for row in csv.DictReader(f) if row.get("Areas")]
+    # A handful of areas get most of the traffic (Zipf-like weights)
+    rng.shuffle(areas)
+    weights = [1.0 / (i + 1) for i in range(len(areas))]
+    endpoints, endpoint_weights = zip(*ENDPOINT_MIX)
+
+    ts = time.time()
+    entries = []
+    for _ in range(count):
+        ts += rng.expovariate(rate)
+        endpoint = rng.choices(endpoints, endpoint_weights)[0]
+        is_map = endpoint == "/map"
+        entries.append({
+            "timestamp": round(ts, 3),
+            "endpoint": endpoint,
+            "region": rng.choices(areas, weights)[0] if is_map else None,
+            "k": 5 if is_map else None,
+        })
+    return entries
+
+
+# ----------------------------
+# Targets
+# ----------------------------
+class ClientTarget:
+    """In-process Flask test client (no network, single process)"""
+
+    def __init__(self, app_dir):
+        # llload.py loads its data files relative to the working directory at import
+        cwd = os.getcwd()
+        os.chdir(app_dir)
+        sys.path.insert(0, app_dir)
+        print("🚀 Importing app (loads graph, may take a while)...")
+        try:
+            import index
+        finally:
+            os.chdir(cwd)
+        # Don't append replayed requests to a recorded traffic log
+        index.TRAFFIC_LOG = ""
+        self.app = index.app
+        self._local = threading.local()
+
+    def pids(self):
+        return [os.getpid()]
+
+    def get(self, path, params, timeout):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        return client.get(path, query_string=params).status_code
+
+    def close(self):
+        pass
+
+
+class GunicornTarget:
+    """Local gunicorn started from the same app module the Procfile uses"""
+
+    def __init__(self, app_dir, workers, port, startup_timeout):
+        # Make sure /health can only be answered by our gunicorn, not whatever
+        # else is already listening on the port
+        port = free_port(port)
+        self.base_url = f"http://127.0.0.1:{port}"
+        cmd = [
+            sys.executable, "-m", "gunicorn",
+            "--chdir", app_dir,
+            "--bind", f"127.0.0.1:{port}",
+            "--workers", str(workers),
+            "--timeout", "300",
+            "index:app",
+        ]
+        print(f"🚀 Starting gunicorn: {' '.join(cmd)}")
+        # Don't append replayed requests to a recorded traffic log
+        env = dict(os.environ)
+        env.pop("TRAFFIC_LOG", None)
+        self.proc = subprocess.Popen(cmd, env=env)
+        deadline = time.time() + startup_timeout
+        while time.time() < deadline:
+            if self.proc.poll() is not None:
+                raise SystemExit(f"❌ gunicorn exited with code {self.proc.returncode}")
+            try:
+                if self.get("/health", {}, timeout=5) == 200 and self.proc.poll() is None:
+                    print(f"✅ gunicorn is up on port {port}")
+                    return
+            except OSError:
+                pass
+            time.sleep(1)
+        self.close()
+        raise SystemExit(f"❌ gunicorn did not become healthy within {startup_timeout}s")
+
+    def pids(self):
+        return child_pids(self.proc.pid)
+
+    def get(self, path, params, timeout):
+        url = self.base_url + path
+        if params:
+            url += "?" + urllib.parse.urlencode(params)
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as resp:
+                resp.read()
+                return resp.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def close(self):
+        if self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+
+
+def free_port(port):
+    """Return port if it can be bound on 127.0.0.1 (0 picks any free port)"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        try:
+            s.bind(("127.0.0.1", port))
+        except OSError:
+            raise SystemExit(f"❌ Port {port} is already in use, pick another with --port")
+        return s.getsockname()[1]
+
+
+# ----------------------------
+# RSS sampling (/proc, Linux only)
+# ----------------------------
+def child_pids(pid):
+    """Direct children of pid (gunicorn workers of the master)"""
+    children = []
+    try:
+        for name in os.listdir("/proc"):
+            if not name.isdigit():
+                continue
+            try:
+                with open(f"/proc/{name}/stat", "r") as f:
+                    # ppid is the 2nd field after the parenthesised command name
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            if ppid == pid:
+                children.append(int(name))
+    except OSError:
+        pass
+    return sorted(children)
+
+
+def rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class RssSampler(threading.Thread):
+    def __init__(self, target, interval):
+        super().__init__(daemon=True)
+        self.target = target
+        self.interval = interval
+        self.samples = []  # (elapsed_s, {pid: rss_mb})
+        self._stop_event = threading.Event()
+
+    def run(self):
+        start = time.time()
+        while not self._stop_event.is_set():
+            snapshot = {}
+            for pid in self.target.pids():
+                value = rss_mb(pid)
+                if value is not None:
+                    snapshot[pid] = round(value, 1)
+            self.samples.append((round(time.time() - start, 2), snapshot))
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+# ----------------------------
+# Replay
+# ----------------------------
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    n = len(sorted_values)
+    idx = min(n - 1, max(0, math.ceil(pct / 100 * n) - 1))
+    return sorted_values[idx]
+
+
+def schedule(entries, rate, speed, poisson, seed=None):
+    """Send offsets (seconds from start) for each entry; all zero means closed loop"""
+    if rate > 0:
+        rng = random.Random(seed)
+        offsets, t = [], 0.0
+        for _ in entries:
+            offsets.append(t)
+            t += rng.expovariate(rate) if poisson else 1.0 / rate
+        return offsets
+    if speed > 0:
+        # Entries without a timestamp go out with the first request
+        stamps = [e.get("timestamp") for e in entries if e.get("timestamp") is not None]
+        t0 = min(stamps) if stamps else 0
+        return [((e.get("timestamp") if e.get("timestamp") is not None else t0) - t0) / speed
+                for e in entries]
+    return [0.0] * len(entries)
+
+
+def replay(target, entries, concurrency, offsets, timeout):
+    """Fire entries at their offsets; latency is measured from the scheduled send
+    time so queueing behind a saturated server is counted (no coordinated omission)"""
+    results = []
+    lock = threading.Lock()
+
+    def send(entry, scheduled):
+        if scheduled is None:
+            scheduled = time.time()  # closed loop: time from actual send
+        params = {}
+        if entry.get("region"):
+            params["region"] = entry["region"]
+        try:
+            status = target.get(entry["endpoint"], params, timeout)
+        except Exception:
+            status = None
+        latency = time.time() - scheduled
+        with lock:
+            results.append((entry["endpoint"], status, latency))
+
+    open_loop = any(offsets)
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for entry, offset in zip(entries, offsets):
+            scheduled = start + offset
+            delay = scheduled - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, entry, scheduled if open_loop else None)
+    elapsed = time.time() - start
+    return results, elapsed
+
+
+def summarize(results, elapsed):
+    latencies = sorted(r[2] for r in results)
+    errors = sum(1 for r in results if r[1] is None or r[1] >= 500)
+    by_status = {}
+    for _, status, _ in results:
+        key = str(status) if status is not None else "exception"
+        by_status[key] = by_status.get(key, 0) + 1
+    by_endpoint = {}
+    for endpoint in sorted({r[0] for r in results}):
+        ep = sorted(r[2] for r in results if r[0] == endpoint)
+        by_endpoint[endpoint] = {
+            "count": len(ep),
+            "p50_ms": round(percentile(ep, 50) * 1000, 1),
+            "p95_ms": round(percentile(ep, 95) * 1000, 1),
+            "p99_ms": round(percentile(ep, 99) * 1000, 1),
+        }
+    return {
+        "requests": len(results),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(results) / elapsed, 2) if elapsed else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+        "error_rate": round(errors / len(results), 4) if results else None,
+        "status_codes": by_status,
+        "endpoints": by_endpoint,
+    }
+
+
+def print_step(label, summary, samples):
+    print(f"\n📊 {label}")
+    print(f"   requests: {summary['requests']} in {summary['elapsed_s']}s "
+          f"-> {summary['throughput_rps']} req/s")
+    print(f"   latency:  p50 {summary['p50_ms']} ms | p95 {summary['p95_ms']} ms | "
+          f"p99 {summary['p99_ms']} ms")
+    print(f"   errors:   {summary['error_rate']:.2%}  status codes: {summary['status_codes']}")
+    for endpoint, stats in summary["endpoints"].items():
+        print(f"   {endpoint:<10} n={stats['count']:<5} p50 {stats['p50_ms']} ms | "
+              f"p95 {stats['p95_ms']} ms | p99 {stats['p99_ms']} ms")
+    if samples:
+        print("   RSS (MB) over time:")
+        for elapsed, snapshot in samples:
+            workers = "  ".join(f"{pid}={mb}" for pid, mb in sorted(snapshot.items()))
+            print(f"     t={elapsed:>7}s  {workers}")
+
+
+def parse_rates(value):
+    """--rate: comma-separated arrival rates; 0 means closed loop / --speed timing"""
+    rates = []
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            raise argparse.ArgumentTypeError(f"empty rate in '{value}'")
+        try:
+            rate = float(part)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid rate '{part}'")
+        if rate < 0 or not math.isfinite(rate):
+            raise argparse.ArgumentTypeError(f"rate must be >= 0, got '{part}'")
+        rates.append(rate)
+    return rates
+
+
+def step_label(rate, speed):
+    if rate:
+        return f"rate {rate} req/s"
+    if speed:
+        return f"original timing x{speed}"
+    return "closed loop"
+
+
+def cmd_synth(args):
+    entries = synth_log(args.count, args.rate, args.seed)
+    with open(args.out, "w", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+    print(f"✅ Wrote {len(entries)} requests to {args.out}")
+    return 0
+
+
+def cmd_replay(args):
+    # Resolve user paths up front so they don't depend on the app's working directory
+    args.log = os.path.abspath(args.log)
+    if args.json:
+        args.json = os.path.abspath(args.json)
+    entries = load_log(args.log)
+    if args.limit:
+        entries = entries[:args.limit]
+    if not entries:
+        print(f"❌ No requests found in {args.log}")
+        return 1
+    rates = args.rate or [0.0]
+
+    if args.target == "gunicorn":
+        target = GunicornTarget(args.app_dir, args.workers, args.port, args.startup_timeout)
+    else:
+        target = ClientTarget(args.app_dir)
+
+    report = {"target": args.target, "concurrency": args.concurrency, "steps": []}
+    try:
+        for rate in rates:
+            offsets = schedule(entries, rate, args.speed, args.poisson, args.seed)
+            sampler = RssSampler(target, args.sample_interval)
+            sampler.start()
+            results, elapsed = replay(target, entries, args.concurrency, offsets, args.timeout)
+            sampler.stop()
+
+            summary = summarize(results, elapsed)
+            summary["rate"] = rate or None
+            summary["rss_mb"] = [{"t": t, "workers": s} for t, s in sampler.samples]
+            report["steps"].append(summary)
+            print_step(f"{step_label(rate, args.speed)}, concurrency {args.concurrency}", summary, sampler.samples)
+    finally:
+        target.close()
+
+    if len(report["steps"]) > 1:
+        print("\n📈 Saturation sweep:")
+        print(f"   {'offered':>22} {'achieved':>10} {'p99 ms':>10} {'errors':>8}")
+        for rate, step in zip(rates, report["steps"]):
+            print(f"   {step_label(rate, args.speed):>22} {step['throughput_rps']:>10} "
+                  f"{step['p99_ms']:>10} {step['error_rate']:>8.2%}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Report written to {args.json}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test / traffic replay for the Mumbai Flood API")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("synth", help="Generate a synthetic production-shaped traffic log")
+    p.add_argument("--count", type=int, default=500)
+    p.add_argument("--rate", type=float, default=5.0, help="Mean arrival rate (req/s)")
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--out", default="traffic.jsonl")
+    p.set_defaults(func=cmd_synth)
+
+    p = sub.add_parser("replay", help="Replay a traffic log against the app")
+    p.add_argument("log", help="JSONL traffic log (recorded via TRAFFIC_LOG or from synth)")
+    p.add_argument("--target", choices=["client", "gunicorn"], default="client")
+    p.add_argument("--app-dir", default=APP_DIR, help="Directory containing index.py and data files")
+    p.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    p.add_argument("--port", type=int, default=0, help="gunicorn port (default: any free port)")
+    p.add_argument("--startup-timeout", type=float, default=300, help="Seconds to wait for /health")
+    p.add_argument("--concurrency", type=int, default=4, help="Max in-flight requests")
+    p.add_argument("--rate", type=parse_rates, default=None,
+                   help="Arrival rate in req/s; comma-separated list runs a saturation sweep")
+    p.add_argument("--poisson", action="store_true", help="Poisson arrivals instead of fixed spacing")
+    p.add_argument("--speed", type=float, default=0.0,
+                   help="Replay with recorded timestamps scaled by this factor (ignored with --rate)")
+    p.add_argument("--limit", type=int, default=0, help="Replay only the first N requests")
+    p.add_argument("--timeout", type=float, default=120, help="Per-request timeout (s)")
+    p.add_argument("--sample-interval", type=float, default=1.0, help="RSS sampling interval (s)")
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--json", default="", help="Write full report to this JSON file")
+    p.set_defaults(func=cmd_replay)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
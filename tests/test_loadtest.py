@@ -0,0 +1,231 @@
+import argparse
+import importlib
+import json
+import os
+import socket
+import sys
+import time
+import types
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import loadtest  # noqa: E402
+
+
+# ----------------------------
+# percentile
+# ----------------------------
+def test_percentile_nearest_rank():
+    assert loadtest.percentile([1, 2, 3, 4, 5], 50) == 3
+    assert loadtest.percentile(list(range(1, 31)), 95) == 29
+    assert loadtest.percentile(list(range(1, 101)), 99) == 99
+    assert loadtest.percentile([7], 99) == 7
+    assert loadtest.percentile([1, 2, 3], 0) == 1
+    assert loadtest.percentile([1, 2, 3], 100) == 3
+
+
+def test_percentile_empty():
+    assert loadtest.percentile([], 50) is None
+
+
+# ----------------------------
+# load_log
+# ----------------------------
+def test_load_log_skips_malformed_lines(tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    path.write_text("\n".join([
+        json.dumps({"timestamp": 2.0, "endpoint": "/regions", "region": None, "k": None}),
+        "",
+        "not json",
+        "5",
+        "[1, 2]",
+        json.dumps({"timestamp": 3.0}),
+        json.dumps({"timestamp": "yesterday", "endpoint": "/map", "region": "colaba", "k": 5}),
+        json.dumps({"timestamp": 4.0, "endpoint": 42, "region": None, "k": None}),
+        json.dumps({"timestamp": 1.0, "endpoint": "/map", "region": "colaba", "k": 5}),
+    ]) + "\n", encoding="utf-8")
+
+    entries = loadtest.load_log(str(path))
+
+    assert [e["endpoint"] for e in entries] == ["/map", "/regions"]
+
+
+# ----------------------------
+# schedule
+# ----------------------------
+def test_schedule_fixed_rate():
+    entries = [{"endpoint": "/health"}] * 4
+    assert loadtest.schedule(entries, 2.0, 0, False) == [0.0, 0.5, 1.0, 1.5]
+
+
+def test_schedule_poisson_is_seeded_and_increasing():
+    entries = [{"endpoint": "/health"}] * 50
+    a = loadtest.schedule(entries, 10.0, 0, True, seed=1)
+    b = loadtest.schedule(entries, 10.0, 0, True, seed=1)
+    assert a == b
+    assert a[0] == 0.0
+    assert all(x < y for x, y in zip(a, a[1:]))
+
+
+def test_schedule_speed_scales_recorded_times():
+    entries = [{"timestamp": 100.0}, {"timestamp": 102.0}, {"timestamp": 104.0}]
+    assert loadtest.schedule(entries, 0, 2.0, False) == [0.0, 1.0, 2.0]
+
+
+def test_schedule_speed_ignores_missing_timestamps():
+    entries = [{"endpoint": "/map"}, {"timestamp": 1.7e9}, {"timestamp": 1.7e9 + 4}]
+    assert loadtest.schedule(entries, 0, 1.0, False) == [0.0, 0.0, 4.0]
+
+
+def test_schedule_closed_loop():
+    entries = [{"timestamp": 1.0}, {"timestamp": 5.0}]
+    assert loadtest.schedule(entries, 0, 0, False) == [0.0, 0.0]
+
+
+# ----------------------------
+# --rate parsing / step labels
+# ----------------------------
+def test_parse_rates():
+    assert loadtest.parse_rates("5") == [5.0]
+    assert loadtest.parse_rates(" 0, 2.5 ,10") == [0.0, 2.5, 10.0]
+
+
+@pytest.mark.parametrize("value", ["5,", "5,,10", "", "fast", "-1", "5,-2", "inf"])
+def test_parse_rates_rejects_bad_input(value):
+    with pytest.raises(argparse.ArgumentTypeError):
+        loadtest.parse_rates(value)
+
+
+def test_step_label():
+    assert loadtest.step_label(5.0, 0) == "rate 5.0 req/s"
+    assert loadtest.step_label(5.0, 2.0) == "rate 5.0 req/s"
+    assert loadtest.step_label(0.0, 2.0) == "original timing x2.0"
+    assert loadtest.step_label(0.0, 0) == "closed loop"
+
+
+# ----------------------------
+# free_port
+# ----------------------------
+def test_free_port_picks_a_port():
+    assert loadtest.free_port(0) > 0
+
+
+def test_free_port_rejects_port_in_use():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        s.listen(1)
+        with pytest.raises(SystemExit):
+            loadtest.free_port(s.getsockname()[1])
+
+
+# ----------------------------
+# summarize
+# ----------------------------
+def test_summarize():
+    results = [
+        ("/map", 200, 0.1),
+        ("/map", 404, 0.3),
+        ("/map", 500, 0.2),
+        ("/regions", 200, 0.05),
+        ("/regions", None, 0.4),
+    ]
+    summary = loadtest.summarize(results, 2.0)
+
+    assert summary["requests"] == 5
+    assert summary["throughput_rps"] == 2.5
+    assert summary["p50_ms"] == 200.0
+    assert summary["p99_ms"] == 400.0
+    # 404 is a valid answer for an unknown region; only 5xx and exceptions count
+    assert summary["error_rate"] == 0.4
+    assert summary["status_codes"] == {"200": 2, "404": 1, "500": 1, "exception": 1}
+    assert summary["endpoints"]["/map"] == {
+        "count": 3, "p50_ms": 200.0, "p95_ms": 300.0, "p99_ms": 300.0,
+    }
+
+
+def test_summarize_empty():
+    summary = loadtest.summarize([], 1.0)
+    assert summary["requests"] == 0
+    assert summary["p50_ms"] is None
+    assert summary["error_rate"] is None
+
+
+# ----------------------------
+# synth_log
+# ----------------------------
+def test_synth_log_shape():
+    entries = loadtest.synth_log(200, 10.0, seed=3)
+
+    assert len(entries) == 200
+    timestamps = [e["timestamp"] for e in entries]
+    assert timestamps == sorted(timestamps)
+    for e in entries:
+        assert e["endpoint"] in dict(loadtest.ENDPOINT_MIX)
+        if e["endpoint"] == "/map":
+            assert e["region"] and e["k"] == 5
+        else:
+            assert e["region"] is None and e["k"] is None
+
+
+# ----------------------------
+# record_traffic (api/index.py)
+# ----------------------------
+@pytest.fixture
+def index_app(monkeypatch, tmp_path):
+    """Import api/index.py with llload replaced, so no graph has to be loaded"""
+    pytest.importorskip("flask")
+    llload = types.ModuleType("llload")
+    llload.get_k_nearest_low_risk_routes = lambda region, G, df, k: (None, 0, [])
+    llload.build_and_save_map = lambda *args: None
+    llload.flood_df = []
+    llload.G = types.SimpleNamespace(nodes=[])
+    monkeypatch.setitem(sys.modules, "llload", llload)
+    monkeypatch.delitem(sys.modules, "index", raising=False)
+    # index.py appends its own directory to sys.path on import
+    saved_path = list(sys.path)
+    sys.path.insert(0, os.path.join(ROOT, "api"))
+    try:
+        index = importlib.import_module("index")
+        log = tmp_path / "traffic.jsonl"
+        monkeypatch.setattr(index, "TRAFFIC_LOG", str(log))
+        yield index.app, log
+    finally:
+        sys.path[:] = saved_path
+        sys.modules.pop("index", None)
+
+
+def test_record_traffic_one_line_per_routed_request(index_app):
+    app, log = index_app
+    client = app.test_client()
+
+    client.get("/map", query_string={"region": "colaba"})
+    client.get("/health")
+    client.get("/does-not-exist")
+
+    lines = log.read_text(encoding="utf-8").splitlines()
+    entries = [json.loads(line) for line in lines]
+    assert [e["endpoint"] for e in entries] == ["/map", "/health"]
+    assert entries[0]["region"] == "colaba"
+    assert entries[0]["k"] == 5
+    assert entries[1]["region"] is None
+    assert entries[1]["k"] is None
+    assert all(isinstance(e["timestamp"], float) for e in entries)
+
+
+def test_record_traffic_logs_arrival_time(index_app):
+    app, log = index_app
+
+    @app.route("/slow")
+    def slow():
+        time.sleep(0.3)
+        return "ok"
+
+    before = time.time()
+    app.test_client().get("/slow")
+    done = time.time()
+
+    entry = json.loads(log.read_text(encoding="utf-8"))
+    assert before <= entry["timestamp"] < done - 0.25